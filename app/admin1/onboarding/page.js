@@ -1,12 +1,13 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useSession, signOut } from 'next-auth/react'
 import { useRouter } from 'next/navigation'
 import { 
   Building2, FileText, Phone, Upload, CheckCircle, 
   ArrowRight, ArrowLeft, Loader2, Shield, Check, LogOut 
 } from 'lucide-react'
+import { toPatchPaths, diffPatch, applyPatch, rebasePatch } from '@/lib/onboarding-patch'
 
 const STEPS = [
   { id: 1, name: 'Company Info', icon: Building2 },
@@ -56,6 +57,9 @@ export default function AdminOnboarding() {
   const router = useRouter()
   const [currentStep, setCurrentStep] = useState(1)
   const [isSaving, setIsSaving] = useState(false)
+  // Last saved field values and profile version, so autosave only sends changes
+  const savedFieldsRef = useRef({})
+  const profileVersionRef = useRef(0)
   const [saveMessage, setSaveMessage] = useState('')
   const [isSubmitting, setIsSubmitting] = useState(false)
 
@@ -124,35 +128,45 @@ export default function AdminOnboarding() {
     }
   }, [status, session, router])
 
+  // Fetch the saved profile and reset the autosave baseline to it
+  const loadSavedProfile = async () => {
+    const res = await fetch('/api/admin/profile')
+    if (!res.ok) return null
+    const data = await res.json()
+    if (data.profile) {
+      savedFieldsRef.current = toPatchPaths(data.profile)
+      profileVersionRef.current = data.profile.onboardingVersion || 0
+    }
+    return data.profile || null
+  }
+
   const fetchSavedProfile = async () => {
     try {
-      const res = await fetch('/api/admin/profile')
-      if (res.ok) {
-        const data = await res.json()
-        if (data.profile) {
-          // Deep merge saved data with initial formData structure
-          const savedData = data.profile
-          setFormData(prev => ({
-            ...prev,
-            companyName: savedData.companyName || prev.companyName,
-            companyType: savedData.companyType || prev.companyType,
-            registrationNumber: savedData.registrationNumber || prev.registrationNumber,
-            yearsInBusiness: savedData.yearsInBusiness || prev.yearsInBusiness,
-            companyAddress: savedData.companyAddress || prev.companyAddress,
-            irdaiLicense: savedData.irdaiLicense || prev.irdaiLicense,
-            productsOffered: savedData.productsOffered || prev.productsOffered,
-            targetSegments: savedData.targetSegments || prev.targetSegments,
-            estimatedPremiumVolume: savedData.estimatedPremiumVolume || prev.estimatedPremiumVolume,
-            authorizedSignatory: savedData.authorizedSignatory || prev.authorizedSignatory,
-            contactDetails: savedData.contactDetails || prev.contactDetails,
-            bankDetails: savedData.bankDetails || prev.bankDetails,
-            documents: savedData.documents || prev.documents,
-          }))
-        }
+      let profileStep = 0
+      const savedData = await loadSavedProfile()
+      if (savedData) {
+        // Deep merge saved data with initial formData structure
+        profileStep = savedData.onboardingStep || 0
+        setFormData(prev => ({
+          ...prev,
+          companyName: savedData.companyName || prev.companyName,
+          companyType: savedData.companyType || prev.companyType,
+          registrationNumber: savedData.registrationNumber || prev.registrationNumber,
+          yearsInBusiness: savedData.yearsInBusiness || prev.yearsInBusiness,
+          companyAddress: savedData.companyAddress || prev.companyAddress,
+          irdaiLicense: savedData.irdaiLicense || prev.irdaiLicense,
+          productsOffered: savedData.productsOffered || prev.productsOffered,
+          targetSegments: savedData.targetSegments || prev.targetSegments,
+          estimatedPremiumVolume: savedData.estimatedPremiumVolume || prev.estimatedPremiumVolume,
+          authorizedSignatory: savedData.authorizedSignatory || prev.authorizedSignatory,
+          contactDetails: savedData.contactDetails || prev.contactDetails,
+          bankDetails: savedData.bankDetails || prev.bankDetails,
+          documents: savedData.documents || prev.documents,
+        }))
       }
       
-      // Resume from saved step using session data
-      const savedStep = session?.user?.onboardingStep || 0
+      // Resume from the step stored with the profile, falling back to session data
+      const savedStep = profileStep || session?.user?.onboardingStep || 0
       if (savedStep > 0 && savedStep < 5) {
         setCurrentStep(savedStep + 1) // Resume at next step
       }
@@ -165,18 +179,53 @@ export default function AdminOnboarding() {
   const autoSave = async (step, data) => {
     try {
       setIsSaving(true)
-      const response = await fetch('/api/onboarding/save', {
+      let patch = diffPatch(savedFieldsRef.current, toPatchPaths(data))
+      const save = () => fetch('/api/onboarding/save', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ step, data, role: 'admin' })
+        body: JSON.stringify({ step, version: profileVersionRef.current, patch })
       })
-      
-      if (response.ok) {
-        setSaveMessage('Saved ✓')
-        setTimeout(() => setSaveMessage(''), 2000)
+
+      let response = await save()
+      let conflicts = {}
+      let remote = {}
+      if (response.status === 409) {
+        // Saved from another session meanwhile: reload, keep its values for the
+        // fields it changed and only re-send the rest of ours
+        const previous = savedFieldsRef.current
+        await loadSavedProfile()
+        remote = diffPatch(previous, savedFieldsRef.current)
+        const rebased = rebasePatch(patch, previous, savedFieldsRef.current)
+        patch = rebased.patch
+        conflicts = rebased.conflicts
+        response = await save()
       }
+
+      if (!response.ok) {
+        const result = await response.json().catch(() => ({}))
+        console.error('Auto-save failed:', response.status, result.error)
+        setSaveMessage('Not saved - please try again')
+        return
+      }
+
+      const result = await response.json()
+      profileVersionRef.current = result.version
+      savedFieldsRef.current = { ...savedFieldsRef.current, ...patch }
+
+      // Show everything the other session saved, then our own edits on top,
+      // so the next save doesn't write its fields back with stale values
+      if (Object.keys(remote).length > 0) {
+        setFormData(prev => applyPatch(applyPatch(prev, remote), patch))
+      }
+      if (Object.keys(conflicts).length > 0) {
+        alert(`Some fields were changed in another session and their newer values were kept: ${Object.keys(conflicts).join(', ')}`)
+      }
+
+      setSaveMessage('Saved ✓')
+      setTimeout(() => setSaveMessage(''), 2000)
     } catch (error) {
       console.error('Auto-save failed:', error)
+      setSaveMessage('Not saved - please try again')
     } finally {
       setIsSaving(false)
     }
@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/db-admin';
 import { logAuditEvent, calculateDiff } from '@/lib/audit-logger';
+import { enqueueWebhookEvent } from '@/lib/webhooks';
 
 export async function PATCH(request, { params }) {
   const startTime = Date.now();
@@ -60,6 +61,26 @@ export async function PATCH(request, { params }) {
       responseTime: Date.now() - startTime,
     });
 
+    // Only notify on the transition into approved, not on later edits
+    if (action === 'approve' && originalData?.status !== 'approved') {
+      await enqueueWebhookEvent({
+        userId: updatedApp.userId,
+        type: 'application.approved',
+        data: {
+          serviceId: updatedApp.applicationNumber,
+          productId: updatedApp.productId,
+          productName: updatedApp.productName,
+          coverageAmount: updatedApp.coverageAmount,
+          premium: {
+            recommended: updatedApp.recommendedPremium,
+            actual: updatedApp.actualPremium || updatedApp.recommendedPremium,
+            currency: 'INR',
+          },
+          approvedAt: updatedApp.updatedAt,
+        },
+      });
+    }
+
     return NextResponse.json(updatedApp);
   } catch (error) {
     console.error('Error updating application:', error);
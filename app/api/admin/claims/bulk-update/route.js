@@ -3,6 +3,7 @@ import { getServerSession } from 'next-auth/next'
 import { getDb } from '@/lib/db'
 import { v4 as uuidv4 } from 'uuid'
 import { authOptions } from '@/app/api/auth/[...nextauth]/route'
+import { enqueueWebhookEvents } from '@/lib/webhooks'
 
 export async function POST(request) {
   try {
@@ -58,6 +59,17 @@ export async function POST(request) {
       await db.collection('notifications').insertMany(notifications)
     }
 
+    await enqueueWebhookEvents(updatedClaims.map(claim => ({
+      userId: claim.userId,
+      type: 'claim.updated',
+      data: {
+        claimId: claim.id,
+        claimNumber: claim.claimNumber,
+        status: claim.status,
+        updatedAt: claim.updatedAt,
+      },
+    })))
+
     return NextResponse.json({
       success: true,
       modifiedCount: result.modifiedCount,
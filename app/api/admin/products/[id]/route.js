@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/db-admin';
 import { logAuditEvent, calculateDiff } from '@/lib/audit-logger';
+import { invalidateProductCatalog } from '@/lib/product-catalog';
 
 export async function GET(request, { params }) {
   try {
@@ -46,6 +47,8 @@ export async function PATCH(request, { params }) {
       return NextResponse.json({ error: 'Product not found' }, { status: 404 });
     }
 
+    invalidateProductCatalog();
+
     const updatedProduct = await db.collection('products').findOne({ id });
 
     // Log audit event
@@ -99,6 +102,8 @@ export async function DELETE(request, { params }) {
       return NextResponse.json({ error: 'Product not found' }, { status: 404 });
     }
 
+    invalidateProductCatalog();
+
     // Log deletion (high severity)
     await logAuditEvent({
       action: 'delete',
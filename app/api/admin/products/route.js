@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/db-admin';
 import { logAuditEvent } from '@/lib/audit-logger';
+import { invalidateProductCatalog } from '@/lib/product-catalog';
 
 export async function GET() {
   try {
@@ -43,6 +44,7 @@ export async function POST(request) {
     };
 
     await db.collection('products').insertOne(product);
+    invalidateProductCatalog();
 
     // Log product creation
     await logAuditEvent({
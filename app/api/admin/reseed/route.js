@@ -1,5 +1,6 @@
 import { NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/db-admin';
+import { invalidateProductCatalog } from '@/lib/product-catalog';
 
 export async function POST() {
   try {
@@ -17,6 +18,8 @@ export async function POST() {
       }
     }
 
+    invalidateProductCatalog();
+
     return NextResponse.json({ success: true, message: 'Database cleared. Refresh any page to reseed.' });
   } catch (error) {
     console.error('Error clearing database:', error);
@@ -4,6 +4,7 @@ import { getDb } from '@/lib/db'
 import { v4 as uuidv4 } from 'uuid'
 import { authOptions } from '@/app/api/auth/[...nextauth]/route'
 import crypto from 'crypto'
+import { assertWebhookUrlAllowed, generateWebhookSecret, WebhookUrlError } from '@/lib/webhooks'
 
 export async function GET(request) {
   try {
@@ -24,6 +25,7 @@ export async function GET(request) {
     return NextResponse.json({
       apiKey: profile.apiKey || null,
       webhookUrl: profile.webhookUrl || '',
+      webhookSecret: profile.webhookSecret || null,
       environment: profile.environment || 'sandbox',
       lastKeyGenerated: profile.lastKeyGenerated || null,
     })
@@ -84,20 +86,40 @@ export async function PUT(request) {
     }
 
     const body = await request.json()
+
+    if (body.webhookUrl) {
+      try {
+        assertWebhookUrlAllowed(body.webhookUrl)
+      } catch (error) {
+        if (!(error instanceof WebhookUrlError)) throw error
+        return NextResponse.json({ error: error.message }, { status: 400 })
+      }
+    }
+
     const db = await getDb()
+    const profile = await db.collection('startup_profiles')
+      .findOne({ userId: session.user.id }, { projection: { webhookSecret: 1 } })
+
+    const update = {
+      webhookUrl: body.webhookUrl,
+      environment: body.environment || 'sandbox',
+      updatedAt: new Date()
+    }
+
+    // Deliveries are signed with this secret; keep it stable across URL changes
+    if (body.webhookUrl && !profile?.webhookSecret) {
+      update.webhookSecret = generateWebhookSecret()
+    }
 
     await db.collection('startup_profiles').updateOne(
       { userId: session.user.id },
-      { 
-        $set: { 
-          webhookUrl: body.webhookUrl,
-          environment: body.environment || 'sandbox',
-          updatedAt: new Date()
-        } 
-      }
+      { $set: update }
     )
 
-    return NextResponse.json({ success: true })
+    return NextResponse.json({
+      success: true,
+      webhookSecret: update.webhookSecret || profile?.webhookSecret || null,
+    })
   } catch (error) {
     console.error('Update integration error:', error)
     return NextResponse.json(
@@ -1,8 +1,19 @@
 import { NextResponse } from 'next/server'
 import { getServerSession } from 'next-auth/next'
-import { getDb } from '@/lib/db'
 import { authOptions } from '@/app/api/auth/[...nextauth]/route'
+import { parseSearchParams, searchProductCatalog } from '@/lib/product-catalog'
 
+// Browsers must revalidate with If-None-Match, which is answered from the cache
+const CACHE_HEADERS = { 'Cache-Control': 'private, no-cache' }
+
+function etagMatches(ifNoneMatch, etag) {
+  if (!ifNoneMatch) return false
+  if (ifNoneMatch.trim() === '*') return true
+  return ifNoneMatch.split(',').some(tag => tag.trim() === etag)
+}
+
+// GET /api/customer/products/search?q=&coverage=&minPrice=&maxPrice=&page=&limit=
+// Omitting page and limit returns every match
 export async function GET(request) {
   try {
     const session = await getServerSession(authOptions)
@@ -11,15 +22,15 @@ export async function GET(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
     }
 
-    const db = await getDb()
-    
-    // Get all active products
-    const products = await db.collection('products')
-      .find({ status: 'active' })
-      .sort({ createdAt: -1 })
-      .toArray()
+    const params = parseSearchParams(new URL(request.url).searchParams)
+    const { body, etag } = await searchProductCatalog(params)
+    const headers = { ...CACHE_HEADERS, ETag: etag }
+
+    if (etagMatches(request.headers.get('if-none-match'), etag)) {
+      return new NextResponse(null, { status: 304, headers })
+    }
 
-    return NextResponse.json({ products })
+    return NextResponse.json(body, { headers })
   } catch (error) {
     console.error('Get products error:', error)
     return NextResponse.json(
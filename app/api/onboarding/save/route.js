@@ -2,7 +2,14 @@ import { NextResponse } from 'next/server'
 import { getServerSession } from 'next-auth/next'
 import { getDb } from '@/lib/db'
 import { authOptions } from '@/app/api/auth/[...nextauth]/route'
-
+import { OnboardingSaveError, saveOnboardingPatch } from '@/lib/onboarding-save'
+import { toPatchPaths } from '@/lib/onboarding-patch'
+
+/**
+ * Autosave onboarding progress.
+ * Body: { step, version, patch } where patch maps dotted field paths to values.
+ * Nested `data` (the old whole-step payload) is still accepted and flattened.
+ */
 export async function POST(request) {
   try {
     const session = await getServerSession(authOptions)
@@ -11,70 +18,29 @@ export async function POST(request) {
       return NextResponse.json({ error: 'Unauthorized' }, { status: 401 })
     }
 
-    const { step, data, role } = await request.json()
-    const db = await getDb()
+    const { step, version, patch, data } = await request.json()
 
-    // Determine collection based on role
-    const collection = role === 'admin' ? 'insurer_profiles' : 'startup_profiles'
+    // Determine collection based on the signed-in user's role
+    const collection = session.user.role === 'admin' ? 'insurer_profiles' : 'startup_profiles'
 
-    // Check if profile exists
-    let profile = await db.collection(collection).findOne({
-      userId: session.user.id
+    const db = await getDb()
+    const saved = await saveOnboardingPatch(db, {
+      collection,
+      userId: session.user.id,
+      version: Number.isInteger(version) && version > 0 ? version : 0,
+      step,
+      patch: patch || toPatchPaths(data || {}),
     })
 
-    // Deep merge function to handle nested objects
-    const deepMerge = (target, source) => {
-      const output = { ...target }
-      for (const key in source) {
-        if (source[key] && typeof source[key] === 'object' && !Array.isArray(source[key])) {
-          output[key] = deepMerge(target[key] || {}, source[key])
-        } else {
-          output[key] = source[key]
-        }
-      }
-      return output
-    }
-
-    if (profile) {
-      // Merge with existing data to preserve previous steps
-      const mergedData = deepMerge(profile, data)
-      
-      // Update existing profile with merged data
-      await db.collection(collection).updateOne(
-        { userId: session.user.id },
-        { 
-          $set: { 
-            ...mergedData,
-            userId: session.user.id, // Ensure userId is preserved
-            updatedAt: new Date()
-          } 
-        }
+    return NextResponse.json({ success: true, message: 'Saved', version: saved.version })
+  } catch (error) {
+    if (error instanceof OnboardingSaveError) {
+      return NextResponse.json(
+        { error: error.message, ...error.details },
+        { status: error.status }
       )
-    } else {
-      // Create new draft profile
-      const { v4: uuidv4 } = require('uuid')
-      await db.collection(collection).insertOne({
-        id: uuidv4(),
-        userId: session.user.id,
-        ...data,
-        createdAt: new Date(),
-        updatedAt: new Date(),
-      })
     }
 
-    // Update user's onboarding step
-    await db.collection('users').updateOne(
-      { id: session.user.id },
-      { 
-        $set: { 
-          onboardingStep: step,
-          updatedAt: new Date()
-        } 
-      }
-    )
-
-    return NextResponse.json({ success: true, message: 'Saved' })
-  } catch (error) {
     console.error('Auto-save error:', error)
     return NextResponse.json(
       { error: 'Failed to save' },
@@ -2,6 +2,7 @@ import { NextResponse } from 'next/server'
 import { getDb } from '@/lib/db'
 import { v4 as uuidv4 } from 'uuid'
 import crypto from 'crypto'
+import { enqueueWebhookEvent } from '@/lib/webhooks'
 
 // Public API endpoint for recording transactions via API key
 export async function POST(request) {
@@ -92,6 +93,21 @@ export async function POST(request) {
       createdAt: new Date(),
     })
 
+    await enqueueWebhookEvent({
+      userId: profile.userId,
+      type: 'transaction.recorded',
+      data: {
+        transactionId: transaction.transactionId,
+        productSold: transaction.productSold,
+        saleAmount: transaction.saleAmount,
+        premiumAmount: transaction.premiumAmount,
+        policyId: transaction.policyId,
+        policyType: transaction.policyType,
+        status: transaction.status,
+        date: transaction.date,
+      },
+    })
+
     return NextResponse.json({
       success: true,
       transaction: {
@@ -1,9 +1,55 @@
 import { NextResponse } from 'next/server'
 import { getDb } from '@/lib/db'
 
+const MAX_BATCH_SERVICE_IDS = 100
+
+const SLIM_PROJECTION = {
+  _id: 0,
+  applicationNumber: 1,
+  recommendedPremium: 1,
+  actualPremium: 1,
+}
+
+const FULL_PROJECTION = {
+  ...SLIM_PROJECTION,
+  productName: 1,
+  productId: 1,
+  companyName: 1,
+  coverageAmount: 1,
+  createdAt: 1,
+  updatedAt: 1,
+}
+
+let indexesReady = null
+
+// Checkout lookups filter on (userId, status, applicationNumber), keyed by apiKey
+function ensureIndexes(db) {
+  if (!indexesReady) {
+    indexesReady = Promise.all([
+      db.collection('applications').createIndex({ userId: 1, status: 1, applicationNumber: 1 }),
+      db.collection('startup_profiles').createIndex({ apiKey: 1 }, { sparse: true }),
+    ]).catch((error) => {
+      indexesReady = null
+      throw error
+    })
+  }
+  return indexesReady
+}
+
+// Accepts ?serviceId=A&serviceId=B as well as ?serviceId=A,B
+function parseServiceIds(searchParams) {
+  const ids = searchParams.getAll('serviceId')
+    .flatMap(value => value.split(','))
+    .map(value => value.trim())
+    .filter(Boolean)
+  return [...new Set(ids)]
+}
+
 /**
  * Public API endpoint to get premium information for customer's products
  * Requires API key authentication
+ *
+ * Query params: serviceId (repeatable or comma-separated), premium, view=slim
  */
 export async function GET(request) {
   try {
@@ -24,13 +70,26 @@ export async function GET(request) {
 
     // Get query parameters for filtering
     const { searchParams } = new URL(request.url)
-    const serviceIdFilter = searchParams.get('serviceId') // Filter by service ID
+    const serviceIds = parseServiceIds(searchParams) // Filter by one or more service IDs
     const premiumFilter = searchParams.get('premium') // Filter by premium amount
+    const slim = searchParams.get('view') === 'slim' // Only serviceId and premium per policy
+
+    if (serviceIds.length > MAX_BATCH_SERVICE_IDS) {
+      return NextResponse.json(
+        {
+          error: 'Bad Request',
+          message: `At most ${MAX_BATCH_SERVICE_IDS} serviceIds can be requested at once`
+        },
+        { status: 400 }
+      )
+    }
 
     // Validate API key and get user
     const db = await getDb()
+    await ensureIndexes(db)
+
     const profile = await db.collection('startup_profiles')
-      .findOne({ apiKey })
+      .findOne({ apiKey }, { projection: { _id: 0, userId: 1, companyName: 1 } })
 
     if (!profile) {
       return NextResponse.json(
@@ -49,48 +108,60 @@ export async function GET(request) {
     }
 
     // Add service ID filter if provided
-    if (serviceIdFilter) {
-      query.applicationNumber = serviceIdFilter
+    if (serviceIds.length === 1) {
+      query.applicationNumber = serviceIds[0]
+    } else if (serviceIds.length > 1) {
+      query.applicationNumber = { $in: serviceIds }
     }
 
-    // Get user's applications (approved policies)
-    let applications = await db.collection('applications')
-      .find(query)
-      .sort({ createdAt: -1 })
-      .toArray()
-
-    // Apply premium filter if provided
+    // Add premium filter if provided; actualPremium falls back to recommendedPremium
     if (premiumFilter) {
       const premiumAmount = parseInt(premiumFilter)
       if (!isNaN(premiumAmount)) {
-        applications = applications.filter(app => 
-          (app.actualPremium || app.recommendedPremium) === premiumAmount
-        )
+        query.$or = [
+          { actualPremium: { $eq: premiumAmount, $nin: [null, 0] } },
+          { actualPremium: { $in: [null, 0] }, recommendedPremium: premiumAmount }
+        ]
       }
     }
 
+    // Get user's applications (approved policies)
+    let cursor = db.collection('applications')
+      .find(query, { projection: slim ? SLIM_PROJECTION : FULL_PROJECTION })
+
+    // A single service lookup is answered straight from the index
+    cursor = serviceIds.length === 1 ? cursor.limit(1) : cursor.sort({ createdAt: -1 })
+
+    const applications = await cursor.toArray()
+
     // Format response with serviceId instead of applicationNumber
-    const premiumData = applications.map(app => ({
-      serviceId: app.applicationNumber, // Renamed from applicationNumber
-      productName: app.productName,
-      productId: app.productId,
-      companyName: app.companyName,
-      coverageAmount: app.coverageAmount,
-      premium: {
+    let totalPremium = 0
+    const premiumData = applications.map(app => {
+      const actual = app.actualPremium || app.recommendedPremium
+      totalPremium += actual || 0
+
+      const premium = {
         recommended: app.recommendedPremium,
-        actual: app.actualPremium || app.recommendedPremium,
+        actual,
         currency: 'INR'
-      },
-      status: 'active',
-      createdAt: app.createdAt,
-      updatedAt: app.updatedAt
-    }))
-
-    // Calculate total premium
-    const totalPremium = premiumData.reduce(
-      (sum, app) => sum + (app.premium.actual || 0), 
-      0
-    )
+      }
+
+      if (slim) {
+        return { serviceId: app.applicationNumber, premium }
+      }
+
+      return {
+        serviceId: app.applicationNumber, // Renamed from applicationNumber
+        productName: app.productName,
+        productId: app.productId,
+        companyName: app.companyName,
+        coverageAmount: app.coverageAmount,
+        premium,
+        status: 'active',
+        createdAt: app.createdAt,
+        updatedAt: app.updatedAt
+      }
+    })
 
     return NextResponse.json({
       success: true,
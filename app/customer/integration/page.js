@@ -1,7 +1,7 @@
 'use client'
 
 import { useEffect, useState } from 'react'
-import { Plug, Key, Copy, RefreshCw, AlertCircle, Check } from 'lucide-react'
+import { Plug, Key, Copy, RefreshCw, AlertCircle, Check, Webhook } from 'lucide-react'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
@@ -14,6 +14,7 @@ export default function IntegrationPage() {
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [copied, setCopied] = useState(false)
+  const [copiedSecret, setCopiedSecret] = useState(false)
   const [webhookUrl, setWebhookUrl] = useState('')
 
   useEffect(() => {
@@ -61,7 +62,11 @@ export default function IntegrationPage() {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ webhookUrl }),
       })
-      if (!res.ok) throw new Error('Failed to update webhook')
+      if (!res.ok) {
+        const data = await res.json().catch(() => ({}))
+        throw new Error(data.error || 'Failed to update webhook')
+      }
+      await fetchIntegration()
       alert('Webhook URL updated successfully!')
     } catch (err) {
       alert(err.message)
@@ -74,6 +79,12 @@ export default function IntegrationPage() {
     setTimeout(() => setCopied(false), 2000)
   }
 
+  function copySecretToClipboard(text) {
+    navigator.clipboard.writeText(text)
+    setCopiedSecret(true)
+    setTimeout(() => setCopiedSecret(false), 2000)
+  }
+
   if (loading) {
     return (
       <div className="space-y-6">
@@ -147,6 +158,58 @@ export default function IntegrationPage() {
         </CardContent>
       </Card>
 
+      <Card>
+        <CardHeader>
+          <CardTitle className="flex items-center gap-2">
+            <Webhook className="h-5 w-5" />
+            Webhooks
+          </CardTitle>
+          <CardDescription>
+            Receive transactions, approvals and claim updates as they happen
+          </CardDescription>
+        </CardHeader>
+        <CardContent className="space-y-4">
+          <div>
+            <Label htmlFor="webhookUrl">Webhook URL</Label>
+            <div className="flex gap-2 mt-2">
+              <Input
+                id="webhookUrl"
+                value={webhookUrl}
+                onChange={(e) => setWebhookUrl(e.target.value)}
+                placeholder="https://your-domain.com/webhooks/vantage"
+                className="font-mono"
+              />
+              <Button onClick={updateWebhook} variant="outline">
+                Save
+              </Button>
+            </div>
+          </div>
+
+          <div>
+            <Label>Signing Secret</Label>
+            <div className="flex gap-2 mt-2">
+              <Input
+                value={integration?.webhookSecret || 'Save a webhook URL to generate a secret'}
+                readOnly
+                type={integration?.webhookSecret ? 'password' : 'text'}
+                className="font-mono"
+              />
+              <Button
+                variant="outline"
+                size="icon"
+                disabled={!integration?.webhookSecret}
+                onClick={() => copySecretToClipboard(integration?.webhookSecret)}
+              >
+                {copiedSecret ? <Check className="h-4 w-4" /> : <Copy className="h-4 w-4" />}
+              </Button>
+            </div>
+            <p className="text-sm text-gray-500 mt-2">
+              Use this secret to verify the X-Webhook-Signature header on each delivery.
+            </p>
+          </div>
+        </CardContent>
+      </Card>
+
       <Card>
         <CardHeader>
           <CardTitle>API Documentation</CardTitle>
@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useSession, signOut } from 'next-auth/react'
 import { useRouter } from 'next/navigation'
 import { 
@@ -8,6 +8,7 @@ import {
   Upload, CheckCircle, ArrowRight, ArrowLeft, Loader2, 
   Check, LogOut, X, Plus, FileText
 } from 'lucide-react'
+import { toPatchPaths, diffPatch, applyPatch, rebasePatch } from '@/lib/onboarding-patch'
 
 const STEPS = [
   { id: 1, name: 'Company', icon: Building2 },
@@ -53,6 +54,9 @@ export default function CustomerOnboarding() {
   const router = useRouter()
   const [currentStep, setCurrentStep] = useState(1)
   const [isSaving, setIsSaving] = useState(false)
+  // Last saved field values and profile version, so autosave only sends changes
+  const savedFieldsRef = useRef({})
+  const profileVersionRef = useRef(0)
   const [saveMessage, setSaveMessage] = useState('')
   const [isSubmitting, setIsSubmitting] = useState(false)
 
@@ -97,45 +101,55 @@ export default function CustomerOnboarding() {
     }
   }, [status, session, router])
 
+  // Fetch the saved profile and reset the autosave baseline to it
+  const loadSavedProfile = async () => {
+    const res = await fetch('/api/customer/profile')
+    if (!res.ok) return null
+    const data = await res.json()
+    if (data.profile) {
+      savedFieldsRef.current = toPatchPaths(data.profile)
+      profileVersionRef.current = data.profile.onboardingVersion || 0
+    }
+    return data.profile || null
+  }
+
   const fetchSavedProfile = async () => {
     try {
-      const res = await fetch('/api/customer/profile')
-      if (res.ok) {
-        const data = await res.json()
-        if (data.profile) {
-          const saved = data.profile
-          setFormData(prev => ({
-            ...prev,
-            companyName: saved.companyName || prev.companyName,
-            industry: saved.industry || prev.industry,
-            businessModel: saved.businessModel || prev.businessModel,
-            incorporationDate: saved.incorporationDate || prev.incorporationDate,
-            companySize: saved.companySize || prev.companySize,
-            companyAddress: saved.companyAddress || prev.companyAddress,
-            contactDetails: saved.contactDetails || prev.contactDetails,
-            founders: saved.founders || prev.founders,
-            businessDescription: saved.businessDescription || prev.businessDescription,
-            productsServices: saved.productsServices || prev.productsServices,
-            customerBase: saved.customerBase || prev.customerBase,
-            monthlyRevenue: saved.monthlyRevenue || prev.monthlyRevenue,
-            expectedGrowth: saved.expectedGrowth || prev.expectedGrowth,
-            fundingStage: saved.fundingStage || prev.fundingStage,
-            totalFunding: saved.totalFunding || prev.totalFunding,
-            previousInsurance: saved.previousInsurance || prev.previousInsurance,
-            previousInsuranceDetails: saved.previousInsuranceDetails || prev.previousInsuranceDetails,
-            claimsHistory: saved.claimsHistory || prev.claimsHistory,
-            qualityControlProcesses: saved.qualityControlProcesses || prev.qualityControlProcesses,
-            certifications: saved.certifications || prev.certifications,
-            complianceStatus: saved.complianceStatus || prev.complianceStatus,
-            interestedProducts: saved.interestedProducts || prev.interestedProducts,
-            estimatedTransactionVolume: saved.estimatedTransactionVolume || prev.estimatedTransactionVolume,
-            averageOrderValue: saved.averageOrderValue || prev.averageOrderValue,
-            bankDetails: saved.bankDetails || prev.bankDetails,
-            documents: saved.documents || prev.documents,
-          }))
-        }
+      let profileStep = 0
+      const saved = await loadSavedProfile()
+      if (saved) {
+        profileStep = saved.onboardingStep || 0
+        setFormData(prev => ({
+          ...prev,
+          companyName: saved.companyName || prev.companyName,
+          industry: saved.industry || prev.industry,
+          businessModel: saved.businessModel || prev.businessModel,
+          incorporationDate: saved.incorporationDate || prev.incorporationDate,
+          companySize: saved.companySize || prev.companySize,
+          companyAddress: saved.companyAddress || prev.companyAddress,
+          contactDetails: saved.contactDetails || prev.contactDetails,
+          founders: saved.founders || prev.founders,
+          businessDescription: saved.businessDescription || prev.businessDescription,
+          productsServices: saved.productsServices || prev.productsServices,
+          customerBase: saved.customerBase || prev.customerBase,
+          monthlyRevenue: saved.monthlyRevenue || prev.monthlyRevenue,
+          expectedGrowth: saved.expectedGrowth || prev.expectedGrowth,
+          fundingStage: saved.fundingStage || prev.fundingStage,
+          totalFunding: saved.totalFunding || prev.totalFunding,
+          previousInsurance: saved.previousInsurance || prev.previousInsurance,
+          previousInsuranceDetails: saved.previousInsuranceDetails || prev.previousInsuranceDetails,
+          claimsHistory: saved.claimsHistory || prev.claimsHistory,
+          qualityControlProcesses: saved.qualityControlProcesses || prev.qualityControlProcesses,
+          certifications: saved.certifications || prev.certifications,
+          complianceStatus: saved.complianceStatus || prev.complianceStatus,
+          interestedProducts: saved.interestedProducts || prev.interestedProducts,
+          estimatedTransactionVolume: saved.estimatedTransactionVolume || prev.estimatedTransactionVolume,
+          averageOrderValue: saved.averageOrderValue || prev.averageOrderValue,
+          bankDetails: saved.bankDetails || prev.bankDetails,
+          documents: saved.documents || prev.documents,
+        }))
       }
-      const savedStep = session?.user?.onboardingStep || 0
+      const savedStep = profileStep || session?.user?.onboardingStep || 0
       if (savedStep > 0 && savedStep < 7) {
         setCurrentStep(savedStep + 1)
       }
@@ -147,17 +161,53 @@ export default function CustomerOnboarding() {
   const autoSave = async (step, data) => {
     try {
       setIsSaving(true)
-      const response = await fetch('/api/onboarding/save', {
+      let patch = diffPatch(savedFieldsRef.current, toPatchPaths(data))
+      const save = () => fetch('/api/onboarding/save', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ step, data, role: 'customer' })
+        body: JSON.stringify({ step, version: profileVersionRef.current, patch })
       })
-      if (response.ok) {
-        setSaveMessage('Saved ✓')
-        setTimeout(() => setSaveMessage(''), 2000)
+
+      let response = await save()
+      let conflicts = {}
+      let remote = {}
+      if (response.status === 409) {
+        // Saved from another session meanwhile: reload, keep its values for the
+        // fields it changed and only re-send the rest of ours
+        const previous = savedFieldsRef.current
+        await loadSavedProfile()
+        remote = diffPatch(previous, savedFieldsRef.current)
+        const rebased = rebasePatch(patch, previous, savedFieldsRef.current)
+        patch = rebased.patch
+        conflicts = rebased.conflicts
+        response = await save()
+      }
+
+      if (!response.ok) {
+        const result = await response.json().catch(() => ({}))
+        console.error('Auto-save failed:', response.status, result.error)
+        setSaveMessage('Not saved - please try again')
+        return
+      }
+
+      const result = await response.json()
+      profileVersionRef.current = result.version
+      savedFieldsRef.current = { ...savedFieldsRef.current, ...patch }
+
+      // Show everything the other session saved, then our own edits on top,
+      // so the next save doesn't write its fields back with stale values
+      if (Object.keys(remote).length > 0) {
+        setFormData(prev => applyPatch(applyPatch(prev, remote), patch))
+      }
+      if (Object.keys(conflicts).length > 0) {
+        alert(`Some fields were changed in another session and their newer values were kept: ${Object.keys(conflicts).join(', ')}`)
       }
+
+      setSaveMessage('Saved ✓')
+      setTimeout(() => setSaveMessage(''), 2000)
     } catch (error) {
       console.error('Auto-save failed:', error)
+      setSaveMessage('Not saved - please try again')
     } finally {
       setIsSaving(false)
     }
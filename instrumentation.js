@@ -0,0 +1,7 @@
+export async function register() {
+  // The dispatcher needs Node's http and Mongo driver, not the edge runtime
+  if (process.env.NEXT_RUNTIME === 'nodejs') {
+    const { startWebhookDispatcher } = await import('@/lib/webhooks');
+    startWebhookDispatcher();
+  }
+}
@@ -1,4 +1,5 @@
 import { v4 as uuidv4 } from 'uuid';
+import { invalidateProductCatalog } from '@/lib/product-catalog';
 
 // Seed function to populate mock data
 export async function seedMockData(db) {
@@ -56,6 +57,7 @@ export async function seedMockData(db) {
   ];
 
   await db.collection('products').insertMany(products);
+  invalidateProductCatalog();
 
   // 2. Create Startups
   const startups = [
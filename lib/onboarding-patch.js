@@ -0,0 +1,74 @@
+// Helpers shared by the onboarding pages and the autosave endpoint.
+
+export function isPlainObject(value) {
+  return value !== null && typeof value === 'object' && !Array.isArray(value) && !(value instanceof Date);
+}
+
+// Flatten nested form data into dotted paths; arrays are replaced whole
+export function toPatchPaths(data, prefix = '', out = {}) {
+  for (const key of Object.keys(data)) {
+    const path = prefix ? `${prefix}.${key}` : key;
+    const value = data[key];
+    if (isPlainObject(value) && Object.keys(value).length > 0) {
+      toPatchPaths(value, path, out);
+    } else {
+      out[path] = value;
+    }
+  }
+  return out;
+}
+
+// Paths in `next` whose values differ from `previous` (both flattened)
+export function diffPatch(previous, next) {
+  const patch = {};
+  for (const [path, value] of Object.entries(next)) {
+    if (JSON.stringify(previous[path]) !== JSON.stringify(value)) {
+      patch[path] = value;
+    }
+  }
+  return patch;
+}
+
+export function cloneContainer(value) {
+  if (Array.isArray(value)) return [...value];
+  return isPlainObject(value) ? { ...value } : {};
+}
+
+// Set `value` at `segments` in `target`, copying containers along the way
+export function setAtPath(target, segments, value) {
+  let node = target;
+  for (const segment of segments.slice(0, -1)) {
+    node[segment] = cloneContainer(node[segment]);
+    node = node[segment];
+  }
+  node[segments[segments.length - 1]] = value;
+}
+
+// Return a copy of `data` with each dotted path in `patch` set
+export function applyPatch(data, patch) {
+  const result = { ...data };
+  for (const [path, value] of Object.entries(patch)) {
+    setAtPath(result, path.split('.'), value);
+  }
+  return result;
+}
+
+/**
+ * Rebase a rejected patch onto a newer save. `previous` holds the fields the
+ * patch was based on and `latest` the fields now saved (both flattened).
+ * Fields the newer save changed are conflicts and are dropped from the patch,
+ * so the newer values win; the rest are re-sent.
+ */
+export function rebasePatch(patch, previous, latest) {
+  const rebased = {};
+  const conflicts = {};
+  for (const [path, value] of Object.entries(patch)) {
+    const changedElsewhere = JSON.stringify(latest[path]) !== JSON.stringify(previous[path]);
+    if (changedElsewhere && JSON.stringify(latest[path]) !== JSON.stringify(value)) {
+      conflicts[path] = latest[path];
+    } else if (JSON.stringify(latest[path]) !== JSON.stringify(value)) {
+      rebased[path] = value;
+    }
+  }
+  return { patch: rebased, conflicts };
+}
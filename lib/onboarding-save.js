@@ -0,0 +1,215 @@
+import { v4 as uuidv4 } from 'uuid';
+import { cloneContainer, isPlainObject, setAtPath } from '@/lib/onboarding-patch';
+
+// Field-level onboarding autosave.
+//
+// Saves arrive as patches of dotted paths ({ 'companyAddress.city': 'Pune' })
+// and are applied with a single versioned updateOne, so only the changed
+// fields are written. Every profile carries an onboardingVersion; a save
+// based on an older version is rejected instead of overwriting newer data.
+// Saves from the same user against the same version that arrive within a
+// short window are merged into one write.
+
+const COALESCE_WINDOW_MS = 150;
+const MAX_PATCH_PATHS = 200;
+
+// Fields autosave must never touch
+const PROTECTED_FIELDS = new Set([
+  '_id', 'id', 'userId', 'createdAt', 'updatedAt',
+  'onboardingVersion', 'onboardingStep', 'onboardingStatus', 'onboardingCompletedAt',
+  'apiKey', 'lastKeyGenerated', 'webhookUrl', 'webhookSecret', 'environment',
+]);
+
+// Survive module reloads in development, same as the Mongo client promise
+if (!global._onboardingSaves) {
+  global._onboardingSaves = new Map();
+}
+if (!global._onboardingIndexes) {
+  global._onboardingIndexes = new Map();
+}
+
+const pending = global._onboardingSaves;
+const indexesReady = global._onboardingIndexes;
+
+export class OnboardingSaveError extends Error {
+  constructor(message, status, details = {}) {
+    super(message);
+    this.status = status;
+    this.details = details;
+  }
+}
+
+export function validatePatch(patch) {
+  if (!isPlainObject(patch)) {
+    throw new OnboardingSaveError('patch must be an object', 400);
+  }
+
+  const paths = Object.keys(patch);
+  if (paths.length > MAX_PATCH_PATHS) {
+    throw new OnboardingSaveError(`patch can contain at most ${MAX_PATCH_PATHS} fields`, 400);
+  }
+
+  for (const path of paths) {
+    const segments = path.split('.');
+    if (segments.some(segment => segment === '' || segment.startsWith('$'))) {
+      throw new OnboardingSaveError(`Invalid field path: ${path}`, 400);
+    }
+    if (PROTECTED_FIELDS.has(segments[0])) {
+      throw new OnboardingSaveError(`Field cannot be autosaved: ${segments[0]}`, 400);
+    }
+  }
+
+  // Mongo rejects a $set containing both 'a' and 'a.b'
+  const pathSet = new Set(paths);
+  for (const path of paths) {
+    const segments = path.split('.');
+    for (let i = 1; i < segments.length; i++) {
+      const ancestor = segments.slice(0, i).join('.');
+      if (pathSet.has(ancestor)) {
+        throw new OnboardingSaveError(`Conflicting field paths: ${ancestor} and ${path}`, 400);
+      }
+    }
+  }
+}
+
+// Apply `patch` on top of `target` so later saves win, keeping paths disjoint
+function mergePatch(target, patch) {
+  for (const [path, value] of Object.entries(patch)) {
+    for (const existing of Object.keys(target)) {
+      if (existing.startsWith(`${path}.`)) delete target[existing];
+    }
+
+    const ancestor = Object.keys(target).find(existing => path.startsWith(`${existing}.`));
+    if (ancestor) {
+      const base = cloneContainer(target[ancestor]);
+      setAtPath(base, path.slice(ancestor.length + 1).split('.'), value);
+      target[ancestor] = base;
+    } else {
+      target[path] = value;
+    }
+  }
+  return target;
+}
+
+// One profile per user, so concurrent first saves can't create two drafts
+function ensureIndexes(db, collection) {
+  if (!indexesReady.has(collection)) {
+    const ready = db.collection(collection)
+      .createIndex({ userId: 1 }, { unique: true })
+      .catch((error) => {
+        indexesReady.delete(collection);
+        // Existing duplicates block the index; saves still work without it
+        console.error(`Failed to create ${collection} userId index:`, error);
+      });
+    indexesReady.set(collection, ready);
+  }
+  return indexesReady.get(collection);
+}
+
+async function writePatch(db, { collection, userId, version, step, patch }) {
+  await ensureIndexes(db, collection);
+
+  // Clicking Next without edits: skip the write so the version stays put
+  if (Object.keys(patch).length === 0) {
+    const current = await db.collection(collection).findOne(
+      { userId },
+      { projection: { _id: 0, onboardingVersion: 1, onboardingStep: 1 } }
+    );
+    if (
+      current
+      && (current.onboardingVersion || 0) === version
+      && (!Number.isInteger(step) || current.onboardingStep === step)
+    ) {
+      return { version };
+    }
+  }
+
+  const now = new Date();
+  const set = { ...patch, updatedAt: now };
+  if (Number.isInteger(step)) set.onboardingStep = step;
+
+  // Profiles saved before versioning existed count as version 0
+  const versionFilter = version === 0
+    ? { onboardingVersion: { $in: [null, 0] } }
+    : { onboardingVersion: version };
+
+  const result = await db.collection(collection).updateOne(
+    { userId, ...versionFilter },
+    { $set: set, $inc: { onboardingVersion: 1 } }
+  );
+
+  if (result.matchedCount === 1) {
+    return { version: version + 1 };
+  }
+
+  if (version === 0) {
+    // First save creates the draft; a no-op if another save created it first
+    try {
+      const created = await db.collection(collection).updateOne(
+        { userId },
+        {
+          $setOnInsert: {
+            ...set,
+            id: uuidv4(),
+            userId,
+            onboardingVersion: 1,
+            createdAt: now,
+          },
+        },
+        { upsert: true }
+      );
+      if (created.upsertedCount === 1) {
+        return { version: 1 };
+      }
+    } catch (error) {
+      // Lost a concurrent upsert race on the unique userId index; fall
+      // through and report the conflict like any other stale save
+      if (error.code !== 11000) throw error;
+    }
+  }
+
+  const current = await db.collection(collection).findOne(
+    { userId },
+    { projection: { _id: 0, onboardingVersion: 1 } }
+  );
+  throw new OnboardingSaveError('Profile was updated by a newer save', 409, {
+    version: current?.onboardingVersion || 0,
+  });
+}
+
+async function flush(key) {
+  const group = pending.get(key);
+  pending.delete(key);
+
+  try {
+    const result = await writePatch(group.db, group);
+    group.waiters.forEach(({ resolve }) => resolve(result));
+  } catch (error) {
+    group.waiters.forEach(({ reject }) => reject(error));
+  }
+}
+
+/**
+ * Save an onboarding patch for `userId`, based on the profile `version` the
+ * client last saw. Resolves to { version } with the new profile version, or
+ * rejects with an OnboardingSaveError (409 when `version` is stale).
+ */
+export function saveOnboardingPatch(db, { collection, userId, version, step, patch }) {
+  validatePatch(patch);
+
+  const key = `${collection}:${userId}:${version}`;
+  let group = pending.get(key);
+
+  if (!group) {
+    group = { db, collection, userId, version, step, patch: {}, waiters: [] };
+    pending.set(key, group);
+    setTimeout(() => flush(key), COALESCE_WINDOW_MS);
+  }
+
+  mergePatch(group.patch, patch);
+  if (Number.isInteger(step)) group.step = step;
+
+  return new Promise((resolve, reject) => {
+    group.waiters.push({ resolve, reject });
+  });
+}
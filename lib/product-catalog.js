@@ -0,0 +1,226 @@
+import { createHash } from 'crypto';
+import { getDb } from '@/lib/db';
+
+// In-process cache of the customer-facing product catalog.
+//
+// Products only change through the admin product routes, reseed and the mock
+// data seeder, which call invalidateProductCatalog() to bump the catalog
+// version. Every cached entry is tagged with the version it was built from, so
+// a bump makes all of them stale at once. A TTL bounds staleness for writes
+// made by other processes (seed scripts, other server instances).
+
+const CATALOG_TTL_MS = 60 * 1000;
+const MAX_CACHED_QUERIES = 200;
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 100;
+
+const PRODUCT_PROJECTION = { _id: 0 };
+
+// Survive module reloads in development, same as the Mongo client promise
+if (!global._productCatalog) {
+  global._productCatalog = {
+    version: 0,
+    catalog: null,
+    queries: new Map(),
+    indexes: new Map(),
+  };
+}
+
+const state = global._productCatalog;
+
+export function invalidateProductCatalog() {
+  state.version += 1;
+  state.catalog = null;
+  state.queries.clear();
+  // Reseed drops the collection, so let the next load re-create the indexes
+  state.indexes.clear();
+}
+
+function isFresh(entry) {
+  return entry
+    && entry.version === state.version
+    && Date.now() - entry.loadedAt < CATALOG_TTL_MS;
+}
+
+function computeEtag(payload) {
+  const hash = createHash('sha1').update(JSON.stringify(payload)).digest('base64url');
+  return `W/"${hash}"`;
+}
+
+// Build each index once per process; a failed build is retried on next use
+function ensureIndex(db, name, keys, options = {}) {
+  if (!state.indexes.has(name)) {
+    const ready = db.collection('products')
+      .createIndex(keys, { ...options, name })
+      .catch((error) => {
+        state.indexes.delete(name);
+        throw error;
+      });
+    state.indexes.set(name, ready);
+  }
+  return state.indexes.get(name);
+}
+
+// Only $text queries need this index, so only the search path waits on it
+function ensureTextIndex(db) {
+  return ensureIndex(
+    db,
+    'products_text',
+    { name: 'text', description: 'text' },
+    { weights: { name: 10, description: 2 } }
+  );
+}
+
+async function loadActiveProducts() {
+  if (isFresh(state.catalog)) {
+    return state.catalog.products;
+  }
+
+  const version = state.version;
+  const db = await getDb();
+  // The sort works without the index, so a failed build shouldn't stop browsing
+  await ensureIndex(db, 'status_1_createdAt_-1', { status: 1, createdAt: -1 }).catch((error) => {
+    console.error('Failed to create products catalog index:', error);
+  });
+
+  const products = await db.collection('products')
+    .find({ status: 'active' }, { projection: PRODUCT_PROJECTION })
+    .sort({ createdAt: -1 })
+    .toArray();
+
+  // Don't publish a result that raced with an invalidation
+  if (version === state.version) {
+    state.catalog = { version, loadedAt: Date.now(), products };
+  }
+  return products;
+}
+
+function toNumber(value) {
+  if (value === null || value === undefined || value === '') return null;
+  const number = Number(value);
+  return Number.isFinite(number) ? number : null;
+}
+
+// Normalize query string parameters into a stable search description.
+// Without page or limit the whole match set is returned, as before paging
+// existed; the unfiltered catalog is already held in memory.
+export function parseSearchParams(searchParams) {
+  const paged = searchParams.has('page') || searchParams.has('limit');
+  const page = paged ? Math.max(1, Math.floor(toNumber(searchParams.get('page')) || 1)) : 1;
+  const limit = paged
+    ? Math.min(
+      MAX_PAGE_SIZE,
+      Math.max(1, Math.floor(toNumber(searchParams.get('limit')) || DEFAULT_PAGE_SIZE))
+    )
+    : null;
+
+  return {
+    q: (searchParams.get('q') || '').trim(),
+    coverage: toNumber(searchParams.get('coverage')),
+    minPrice: toNumber(searchParams.get('minPrice')),
+    maxPrice: toNumber(searchParams.get('maxPrice')),
+    page,
+    limit,
+  };
+}
+
+function matchesFilters(product, { coverage, minPrice, maxPrice }) {
+  if (coverage !== null && !(product.coverageMin <= coverage && coverage <= product.coverageMax)) {
+    return false;
+  }
+  if (minPrice !== null && !(product.basePrice >= minPrice)) return false;
+  if (maxPrice !== null && !(product.basePrice <= maxPrice)) return false;
+  return true;
+}
+
+function buildFilterQuery({ q, coverage, minPrice, maxPrice }) {
+  const query = { status: 'active', $text: { $search: q } };
+
+  if (coverage !== null) {
+    query.coverageMin = { $lte: coverage };
+    query.coverageMax = { $gte: coverage };
+  }
+  if (minPrice !== null || maxPrice !== null) {
+    query.basePrice = {};
+    if (minPrice !== null) query.basePrice.$gte = minPrice;
+    if (maxPrice !== null) query.basePrice.$lte = maxPrice;
+  }
+
+  return query;
+}
+
+// The relevance score is only needed for sorting, not in the response
+function withoutScore({ score, ...product }) {
+  return product;
+}
+
+async function runTextSearch(params) {
+  const db = await getDb();
+  await ensureTextIndex(db);
+
+  const query = buildFilterQuery(params);
+  const cursor = db.collection('products')
+    .find(query, { projection: { ...PRODUCT_PROJECTION, score: { $meta: 'textScore' } } })
+    .sort({ score: { $meta: 'textScore' }, createdAt: -1 });
+
+  if (params.limit === null) {
+    const products = await cursor.toArray();
+    return { products: products.map(withoutScore), total: products.length };
+  }
+
+  const [products, total] = await Promise.all([
+    cursor.skip((params.page - 1) * params.limit).limit(params.limit).toArray(),
+    db.collection('products').countDocuments(query),
+  ]);
+
+  return { products: products.map(withoutScore), total };
+}
+
+async function runCatalogFilter(params) {
+  const catalog = await loadActiveProducts();
+  const matching = catalog.filter((product) => matchesFilters(product, params));
+  if (params.limit === null) {
+    return { products: matching, total: matching.length };
+  }
+
+  const skip = (params.page - 1) * params.limit;
+  return {
+    products: matching.slice(skip, skip + params.limit),
+    total: matching.length,
+  };
+}
+
+// Returns { body, etag } for a parsed search, served from cache when possible
+export async function searchProductCatalog(params) {
+  const key = JSON.stringify(params);
+  const cached = state.queries.get(key);
+  if (isFresh(cached)) {
+    return cached.result;
+  }
+
+  const version = state.version;
+  const { products, total } = params.q
+    ? await runTextSearch(params)
+    : await runCatalogFilter(params);
+
+  const body = {
+    products,
+    pagination: {
+      page: params.page,
+      limit: params.limit ?? total,
+      total,
+      totalPages: params.limit === null ? 1 : Math.ceil(total / params.limit),
+    },
+  };
+  const result = { body, etag: computeEtag(body) };
+
+  if (version === state.version) {
+    if (state.queries.size >= MAX_CACHED_QUERIES) {
+      // Map keeps insertion order, so the first key is the oldest entry
+      state.queries.delete(state.queries.keys().next().value);
+    }
+    state.queries.set(key, { version, loadedAt: Date.now(), result });
+  }
+
+  return result;
+}
@@ -0,0 +1,545 @@
+import crypto from 'crypto';
+import dns from 'dns';
+import http from 'http';
+import https from 'https';
+import net from 'net';
+import { v4 as uuidv4 } from 'uuid';
+import { getDb } from '@/lib/db';
+
+// Outbound webhook delivery.
+//
+// Routes call enqueueWebhookEvents() to write events to the durable
+// `webhook_outbox` collection and return immediately. A background dispatcher
+// claims due events, groups them per customer endpoint, POSTs them in signed
+// batches through a bounded keep-alive connection pool and retries failures
+// with exponential backoff. Events that keep failing are moved to
+// `webhook_dead_letters`. instrumentation.js starts the dispatcher when the
+// server boots, so retries and expired leases are picked up after a restart
+// even if nothing new is enqueued.
+
+const OUTBOX = 'webhook_outbox';
+const DEAD_LETTERS = 'webhook_dead_letters';
+
+const MAX_CONCURRENT_REQUESTS = 8;
+const MAX_EVENTS_PER_BATCH = 50;
+const MAX_EVENTS_PER_RUN = 500;
+const MAX_ATTEMPTS = 8;
+const REQUEST_TIMEOUT_MS = 10 * 1000;
+// Long enough for a full run of timed-out requests through the pool
+const LEASE_MS = 15 * 60 * 1000;
+const BASE_BACKOFF_MS = 30 * 1000;
+const MAX_BACKOFF_MS = 60 * 60 * 1000;
+const COALESCE_DELAY_MS = 250;
+const POLL_INTERVAL_MS = 30 * 1000;
+const DELIVERED_RETENTION_SECONDS = 7 * 24 * 60 * 60;
+
+export const WEBHOOK_SIGNATURE_HEADER = 'X-Webhook-Signature';
+
+// Local development only: allow plain http and loopback/private hosts, e.g.
+// the stand-in receiver used by test-webhooks.js
+const ALLOW_PRIVATE_URLS = process.env.WEBHOOKS_ALLOW_PRIVATE_URLS === 'true';
+
+// Loopback, private, link-local, unspecified, CGNAT, multicast and reserved
+const blockedAddresses = new net.BlockList();
+[
+  ['0.0.0.0', 8], ['10.0.0.0', 8], ['100.64.0.0', 10], ['127.0.0.0', 8],
+  ['169.254.0.0', 16], ['172.16.0.0', 12], ['192.0.0.0', 24], ['192.168.0.0', 16],
+  ['198.18.0.0', 15], ['224.0.0.0', 4], ['240.0.0.0', 4],
+].forEach(([address, prefix]) => blockedAddresses.addSubnet(address, prefix, 'ipv4'));
+[
+  ['::', 128], ['::1', 128], ['fc00::', 7], ['fe80::', 10], ['ff00::', 8],
+].forEach(([address, prefix]) => blockedAddresses.addSubnet(address, prefix, 'ipv6'));
+
+const BLOCKED_HOST_SUFFIXES = ['.localhost', '.local', '.internal'];
+
+// Raised for URLs we refuse to call; deliveries to them are not retried
+export class WebhookUrlError extends Error {}
+
+function isBlockedAddress(address) {
+  const family = net.isIP(address);
+  if (family === 4) return blockedAddresses.check(address, 'ipv4');
+  if (family !== 6) return true;
+
+  // BlockList also matches IPv4-mapped IPv6 (::ffff:a00:1) against the IPv4 rules
+  return blockedAddresses.check(address, 'ipv6');
+}
+
+/**
+ * Throws a WebhookUrlError unless `value` is an https URL on a public host.
+ * Only the literal host is checked here; postJson re-checks every address
+ * the hostname resolves to when it connects.
+ */
+export function assertWebhookUrlAllowed(value) {
+  let url;
+  try {
+    url = new URL(value);
+  } catch {
+    throw new WebhookUrlError('webhookUrl must be a valid URL');
+  }
+
+  const allowedProtocols = ALLOW_PRIVATE_URLS ? ['https:', 'http:'] : ['https:'];
+  if (!allowedProtocols.includes(url.protocol)) {
+    throw new WebhookUrlError('webhookUrl must use https');
+  }
+  if (url.username || url.password) {
+    throw new WebhookUrlError('webhookUrl must not contain credentials');
+  }
+  if (ALLOW_PRIVATE_URLS) return url;
+
+  const hostname = url.hostname.replace(/^\[|\]$/g, '').toLowerCase();
+  if (net.isIP(hostname)) {
+    if (isBlockedAddress(hostname)) {
+      throw new WebhookUrlError('webhookUrl must not point to a private or local address');
+    }
+  } else if (
+    hostname === 'localhost'
+    || !hostname.includes('.')
+    || BLOCKED_HOST_SUFFIXES.some(suffix => hostname.endsWith(suffix))
+  ) {
+    throw new WebhookUrlError('webhookUrl must be a public hostname');
+  }
+
+  return url;
+}
+
+// dns.lookup replacement that refuses to connect to blocked addresses
+function guardedLookup(hostname, options, callback) {
+  dns.lookup(hostname, options, (error, address, family) => {
+    if (error) {
+      callback(error);
+      return;
+    }
+
+    const addresses = Array.isArray(address) ? address.map(entry => entry.address) : [address];
+    const blocked = addresses.find(isBlockedAddress);
+    if (blocked) {
+      callback(new WebhookUrlError(`Webhook host ${hostname} resolves to blocked address ${blocked}`));
+      return;
+    }
+    callback(null, address, family);
+  });
+}
+
+const agentOptions = { keepAlive: true, maxSockets: MAX_CONCURRENT_REQUESTS };
+const agents = {
+  'http:': new http.Agent(agentOptions),
+  'https:': new https.Agent(agentOptions),
+};
+
+// Survive module reloads in development, same as the Mongo client promise
+if (!global._webhookDispatcher) {
+  global._webhookDispatcher = {
+    running: false,
+    rerun: false,
+    timer: null,
+    poller: null,
+    indexesReady: null,
+  };
+}
+
+const state = global._webhookDispatcher;
+
+export function generateWebhookSecret() {
+  return `whsec_${crypto.randomBytes(24).toString('hex')}`;
+}
+
+// Returns "t=<unix seconds>,v1=<hex HMAC-SHA256 of `${t}.${body}`>"
+export function signWebhookPayload(secret, body, timestamp = Math.floor(Date.now() / 1000)) {
+  const signature = crypto
+    .createHmac('sha256', secret)
+    .update(`${timestamp}.${body}`)
+    .digest('hex');
+  return `t=${timestamp},v1=${signature}`;
+}
+
+async function ensureIndexes(db) {
+  if (!state.indexesReady) {
+    state.indexesReady = Promise.all([
+      db.collection(OUTBOX).createIndex({ id: 1 }, { unique: true }),
+      db.collection(OUTBOX).createIndex({ status: 1, nextAttemptAt: 1 }),
+      db.collection(OUTBOX).createIndex({ leaseId: 1 }, { sparse: true }),
+      db.collection(OUTBOX).createIndex(
+        { deliveredAt: 1 },
+        { expireAfterSeconds: DELIVERED_RETENTION_SECONDS }
+      ),
+    ]).catch((error) => {
+      state.indexesReady = null;
+      throw error;
+    });
+  }
+  return state.indexesReady;
+}
+
+/**
+ * Queue events for delivery to the owning customers' webhook endpoints.
+ * Each event is { userId, type, data }. Events for customers without a
+ * webhookUrl are dropped. Never throws - webhooks must not break the
+ * request that produced them.
+ *
+ * Uses its own getDb() handle so the outbox always lives in the database the
+ * dispatcher reads, whichever connection the calling route uses.
+ */
+export async function enqueueWebhookEvents(events) {
+  try {
+    if (!events || events.length === 0) return;
+
+    const db = await getDb();
+    const userIds = [...new Set(events.map(event => event.userId).filter(Boolean))];
+    const subscribed = await db.collection('startup_profiles')
+      .find(
+        { userId: { $in: userIds }, webhookUrl: { $nin: [null, ''] } },
+        { projection: { _id: 0, userId: 1 } }
+      )
+      .toArray();
+    const subscribedIds = new Set(subscribed.map(profile => profile.userId));
+
+    const now = new Date();
+    const outboxEvents = events
+      .filter(event => subscribedIds.has(event.userId))
+      .map(event => ({
+        id: uuidv4(),
+        userId: event.userId,
+        type: event.type,
+        data: event.data,
+        status: 'pending',
+        attempts: 0,
+        nextAttemptAt: now,
+        createdAt: now,
+        updatedAt: now,
+      }));
+
+    if (outboxEvents.length === 0) return;
+
+    await ensureIndexes(db);
+    await db.collection(OUTBOX).insertMany(outboxEvents);
+    scheduleWebhookDispatch();
+  } catch (error) {
+    console.error('Failed to enqueue webhook events:', error);
+  }
+}
+
+export function enqueueWebhookEvent(event) {
+  return enqueueWebhookEvents([event]);
+}
+
+// Coalesce bursts of enqueues into a single dispatcher run
+export function scheduleWebhookDispatch(delay = COALESCE_DELAY_MS) {
+  startPoller();
+
+  if (state.running) {
+    state.rerun = true;
+    return;
+  }
+  if (state.timer) return;
+
+  state.timer = setTimeout(async () => {
+    state.timer = null;
+    state.running = true;
+    try {
+      do {
+        state.rerun = false;
+        const { claimed } = await dispatchWebhooks();
+        // Keep draining while a full run's worth of events was waiting
+        if (claimed >= MAX_EVENTS_PER_RUN) state.rerun = true;
+      } while (state.rerun);
+    } catch (error) {
+      console.error('Webhook dispatch failed:', error);
+    } finally {
+      state.running = false;
+    }
+  }, delay);
+}
+
+// Periodically picks up due retries and expired leases
+function startPoller() {
+  if (state.poller) return;
+  state.poller = setInterval(() => scheduleWebhookDispatch(0), POLL_INTERVAL_MS);
+  state.poller.unref?.();
+}
+
+/**
+ * Start polling the outbox and drain anything already due. Called once from
+ * instrumentation.js at server boot; safe to call again.
+ */
+export function startWebhookDispatcher() {
+  scheduleWebhookDispatch(0);
+}
+
+async function claimDueEvents(db) {
+  const now = new Date();
+  const due = await db.collection(OUTBOX)
+    .find(
+      {
+        $or: [
+          { status: 'pending', nextAttemptAt: { $lte: now } },
+          // Leases left behind by a crashed or timed-out dispatcher
+          { status: 'delivering', leaseExpiresAt: { $lte: now } },
+        ],
+      },
+      { projection: { _id: 0, id: 1 } }
+    )
+    .sort({ nextAttemptAt: 1 })
+    .limit(MAX_EVENTS_PER_RUN)
+    .toArray();
+
+  if (due.length === 0) return [];
+
+  const leaseId = uuidv4();
+  await db.collection(OUTBOX).updateMany(
+    {
+      id: { $in: due.map(event => event.id) },
+      $or: [
+        { status: 'pending', nextAttemptAt: { $lte: now } },
+        { status: 'delivering', leaseExpiresAt: { $lte: now } },
+      ],
+    },
+    {
+      $set: {
+        status: 'delivering',
+        leaseId,
+        leaseExpiresAt: new Date(now.getTime() + LEASE_MS),
+        updatedAt: now,
+      },
+    }
+  );
+
+  // Another process may have claimed some of them first
+  return db.collection(OUTBOX)
+    .find({ leaseId }, { projection: { _id: 0 } })
+    .sort({ createdAt: 1 })
+    .toArray();
+}
+
+function buildBatches(events, profiles) {
+  const byUser = new Map();
+  const orphaned = [];
+
+  for (const event of events) {
+    const profile = profiles.get(event.userId);
+    if (!profile?.webhookUrl) {
+      orphaned.push(event);
+      continue;
+    }
+    if (!byUser.has(event.userId)) byUser.set(event.userId, []);
+    byUser.get(event.userId).push(event);
+  }
+
+  const batches = [];
+  for (const [userId, userEvents] of byUser) {
+    const profile = profiles.get(userId);
+    for (let i = 0; i < userEvents.length; i += MAX_EVENTS_PER_BATCH) {
+      batches.push({
+        leaseId: userEvents[0].leaseId,
+        url: profile.webhookUrl,
+        secret: profile.webhookSecret,
+        events: userEvents.slice(i, i + MAX_EVENTS_PER_BATCH),
+      });
+    }
+  }
+
+  return { batches, orphaned };
+}
+
+function postJson(url, body, headers) {
+  return new Promise((resolve, reject) => {
+    let target;
+    try {
+      target = assertWebhookUrlAllowed(url);
+    } catch (error) {
+      reject(error);
+      return;
+    }
+
+    const transport = target.protocol === 'https:' ? https : http;
+    const agent = agents[target.protocol];
+
+    const req = transport.request(target, {
+      method: 'POST',
+      agent,
+      lookup: ALLOW_PRIVATE_URLS ? undefined : guardedLookup,
+      timeout: REQUEST_TIMEOUT_MS,
+      headers: {
+        'Content-Type': 'application/json',
+        'Content-Length': Buffer.byteLength(body),
+        ...headers,
+      },
+    }, (res) => {
+      // Drain the body so the socket returns to the keep-alive pool
+      res.resume();
+      res.on('end', () => resolve(res.statusCode));
+      res.on('error', reject);
+    });
+
+    req.on('timeout', () => req.destroy(new Error('Webhook request timed out')));
+    req.on('error', reject);
+    req.end(body);
+  });
+}
+
+function isRetryable(statusCode) {
+  return statusCode === 408 || statusCode === 429 || statusCode >= 500;
+}
+
+function backoffDelay(attempts) {
+  const delay = Math.min(MAX_BACKOFF_MS, BASE_BACKOFF_MS * 2 ** (attempts - 1));
+  // Jitter so a recovering endpoint isn't hit by every retry at once
+  return delay / 2 + Math.random() * (delay / 2);
+}
+
+async function deliverBatch(batch) {
+  const body = JSON.stringify({
+    id: uuidv4(),
+    sentAt: new Date().toISOString(),
+    events: batch.events.map(event => ({
+      id: event.id,
+      type: event.type,
+      createdAt: event.createdAt,
+      data: event.data,
+    })),
+  });
+
+  const headers = {};
+  if (batch.secret) {
+    headers[WEBHOOK_SIGNATURE_HEADER] = signWebhookPayload(batch.secret, body);
+  }
+
+  try {
+    const statusCode = await postJson(batch.url, body, headers);
+    if (statusCode >= 200 && statusCode < 300) {
+      return { delivered: true };
+    }
+    return {
+      delivered: false,
+      retryable: isRetryable(statusCode),
+      error: `Endpoint responded with HTTP ${statusCode}`,
+    };
+  } catch (error) {
+    return {
+      delivered: false,
+      retryable: !(error instanceof WebhookUrlError),
+      error: error.message,
+    };
+  }
+}
+
+// Writes are filtered on `leaseId` so a dispatcher whose lease expired
+// mid-run can't overwrite the outcome recorded by the one that took over
+async function moveToDeadLetters(db, leaseId, events, error) {
+  if (events.length === 0) return;
+
+  const now = new Date();
+  await db.collection(DEAD_LETTERS).insertMany(events.map(event => ({
+    id: event.id,
+    userId: event.userId,
+    type: event.type,
+    data: event.data,
+    attempts: event.attempts,
+    lastError: error,
+    createdAt: event.createdAt,
+    failedAt: now,
+  })));
+  await db.collection(OUTBOX).deleteMany({
+    id: { $in: events.map(event => event.id) },
+    leaseId,
+  });
+}
+
+async function recordOutcome(db, batch, outcome) {
+  const now = new Date();
+
+  if (outcome.delivered) {
+    await db.collection(OUTBOX).updateMany(
+      { id: { $in: batch.events.map(event => event.id) }, leaseId: batch.leaseId },
+      {
+        $set: { status: 'delivered', deliveredAt: now, updatedAt: now },
+        $inc: { attempts: 1 },
+        $unset: { leaseId: '', leaseExpiresAt: '', lastError: '' },
+      }
+    );
+    return;
+  }
+
+  const exhausted = [];
+  const retries = [];
+  for (const event of batch.events) {
+    const attempts = event.attempts + 1;
+    if (!outcome.retryable || attempts >= MAX_ATTEMPTS) {
+      exhausted.push({ ...event, attempts });
+    } else {
+      retries.push({
+        updateOne: {
+          filter: { id: event.id, leaseId: batch.leaseId },
+          update: {
+            $set: {
+              status: 'pending',
+              attempts,
+              nextAttemptAt: new Date(now.getTime() + backoffDelay(attempts)),
+              lastError: outcome.error,
+              updatedAt: now,
+            },
+            $unset: { leaseId: '', leaseExpiresAt: '' },
+          },
+        },
+      });
+    }
+  }
+
+  if (retries.length > 0) {
+    await db.collection(OUTBOX).bulkWrite(retries, { ordered: false });
+  }
+  await moveToDeadLetters(db, batch.leaseId, exhausted, outcome.error);
+}
+
+// Run `worker` over `items` with at most `limit` in flight
+async function runPool(items, limit, worker) {
+  let next = 0;
+  const runners = Array.from({ length: Math.min(limit, items.length) }, async () => {
+    while (next < items.length) {
+      const item = items[next++];
+      await worker(item);
+    }
+  });
+  await Promise.all(runners);
+}
+
+// Deliver one run's worth of due outbox events
+async function dispatchWebhooks() {
+  const db = await getDb();
+  await ensureIndexes(db);
+
+  const events = await claimDueEvents(db);
+  if (events.length === 0) {
+    return { claimed: 0, delivered: 0, failed: 0 };
+  }
+
+  const userIds = [...new Set(events.map(event => event.userId))];
+  const profiles = await db.collection('startup_profiles')
+    .find(
+      { userId: { $in: userIds } },
+      { projection: { _id: 0, userId: 1, webhookUrl: 1, webhookSecret: 1 } }
+    )
+    .toArray();
+
+  const { batches, orphaned } = buildBatches(
+    events,
+    new Map(profiles.map(profile => [profile.userId, profile]))
+  );
+
+  // Every event in a run shares the lease taken by claimDueEvents
+  await moveToDeadLetters(db, events[0].leaseId, orphaned, 'Webhook URL removed');
+
+  let delivered = 0;
+  let failed = orphaned.length;
+
+  await runPool(batches, MAX_CONCURRENT_REQUESTS, async (batch) => {
+    const outcome = await deliverBatch(batch);
+    await recordOutcome(db, batch, outcome);
+    if (outcome.delivered) {
+      delivered += batch.events.length;
+    } else {
+      failed += batch.events.length;
+    }
+  });
+
+  return { claimed: events.length, delivered, failed };
+}
@@ -6,6 +6,8 @@ const nextConfig = {
   experimental: {
     // Remove if not using Server Components
     serverComponentsExternalPackages: ['mongodb'],
+    // Runs instrumentation.js at boot to start the webhook dispatcher
+    instrumentationHook: true,
   },
   webpack(config, { dev }) {
     if (dev) {
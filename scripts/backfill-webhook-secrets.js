@@ -0,0 +1,49 @@
+const { MongoClient } = require('mongodb');
+const crypto = require('crypto');
+
+const MONGO_URL = process.env.MONGO_URL || 'mongodb://localhost:27017';
+const DB_NAME = process.env.DB_NAME || 'your_database_name';
+
+// One-off: give profiles that saved a webhook URL before signing existed a
+// webhookSecret, so their deliveries are signed
+async function backfillWebhookSecrets() {
+  let client;
+
+  try {
+    console.log('🔌 Connecting to MongoDB...');
+    client = new MongoClient(MONGO_URL);
+    await client.connect();
+
+    const db = client.db(DB_NAME);
+
+    const profiles = await db.collection('startup_profiles')
+      .find(
+        { webhookUrl: { $nin: [null, ''] }, webhookSecret: { $exists: false } },
+        { projection: { userId: 1, companyName: 1 } }
+      )
+      .toArray();
+
+    console.log(`\n📊 Found ${profiles.length} profiles without a webhook secret`);
+
+    for (const profile of profiles) {
+      const webhookSecret = `whsec_${crypto.randomBytes(24).toString('hex')}`;
+      await db.collection('startup_profiles').updateOne(
+        { _id: profile._id, webhookSecret: { $exists: false } },
+        { $set: { webhookSecret, updatedAt: new Date() } }
+      );
+      console.log(`   ✓ ${profile.companyName || profile.userId}`);
+    }
+
+    console.log('\n✅ Backfill complete!\n');
+  } catch (error) {
+    console.error('\n❌ Error backfilling webhook secrets:', error.message);
+    process.exit(1);
+  } finally {
+    if (client) {
+      await client.close();
+      console.log('🔌 Connection closed.\n');
+    }
+  }
+}
+
+backfillWebhookSecrets();
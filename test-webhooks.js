@@ -0,0 +1,142 @@
+const http = require('http');
+const crypto = require('crypto');
+const { MongoClient } = require('mongodb');
+
+const MONGO_URL = 'mongodb://localhost:27017';
+const DB_NAME = 'insureinfra';
+const APP_URL = 'http://localhost:3000';
+const RECEIVER_PORT = 4010;
+
+// The dev server must run with WEBHOOKS_ALLOW_PRIVATE_URLS=true, otherwise
+// it refuses to deliver to the receiver on localhost
+
+// Stand-in partner endpoint: fails the first delivery, accepts the rest
+function startReceiver(secret) {
+  const deliveries = [];
+  let requests = 0;
+
+  const server = http.createServer((req, res) => {
+    let body = '';
+    req.on('data', chunk => { body += chunk; });
+    req.on('end', () => {
+      requests += 1;
+
+      const header = req.headers['x-webhook-signature'] || '';
+      const { t, v1 } = Object.fromEntries(header.split(',').map(part => part.split('=')));
+      const expected = crypto.createHmac('sha256', secret).update(`${t}.${body}`).digest('hex');
+      const signatureValid = v1 === expected;
+
+      if (requests === 1) {
+        res.writeHead(500);
+        res.end();
+        return;
+      }
+
+      deliveries.push({ signatureValid, payload: JSON.parse(body) });
+      res.writeHead(200);
+      res.end();
+    });
+  });
+
+  return new Promise(resolve => {
+    server.listen(RECEIVER_PORT, () => resolve({ server, deliveries }));
+  });
+}
+
+// Prints a ✓/❌ line; any failure makes the script exit non-zero
+function check(passed, passMessage, failMessage) {
+  if (passed) {
+    console.log(`✓ ${passMessage}`);
+  } else {
+    console.log(`❌ ${failMessage}`);
+    process.exitCode = 1;
+  }
+}
+
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+async function recordTransaction(apiKey, productSold) {
+  const res = await fetch(`${APP_URL}/api/transactions/record`, {
+    method: 'POST',
+    headers: {
+      'Authorization': `Bearer ${apiKey}`,
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ productSold, saleAmount: 1000, premiumAmount: 25 }),
+  });
+  return res.json();
+}
+
+async function testWebhooks() {
+  console.log('🧪 TESTING WEBHOOK DELIVERY\n');
+  console.log('='.repeat(70));
+
+  const client = new MongoClient(MONGO_URL);
+  await client.connect();
+  const db = client.db(DB_NAME);
+  let receiver = null;
+
+  try {
+    // Step 1: Point a customer's webhook at the local receiver
+    console.log('\n📋 STEP 1: Registering Local Webhook Receiver');
+    console.log('-'.repeat(70));
+
+    const profile = await db.collection('startup_profiles').findOne({ apiKey: { $exists: true } });
+
+    if (!profile) {
+      console.log('❌ No customer with an API key found. Run test-premium-api.js first.');
+      process.exitCode = 1;
+      return;
+    }
+
+    const webhookSecret = profile.webhookSecret || `whsec_${crypto.randomBytes(24).toString('hex')}`;
+    await db.collection('startup_profiles').updateOne(
+      { userId: profile.userId },
+      { $set: { webhookUrl: `http://localhost:${RECEIVER_PORT}/webhooks`, webhookSecret } }
+    );
+
+    receiver = await startReceiver(webhookSecret);
+    console.log(`✓ Receiver listening on port ${RECEIVER_PORT}`);
+
+    // Step 2: First delivery fails and is scheduled for retry
+    console.log('\n📋 STEP 2: Failed Delivery Is Retried');
+    console.log('-'.repeat(70));
+
+    const first = await recordTransaction(profile.apiKey, 'Webhook Test A');
+    console.log(`Recorded ${first.transaction?.transactionId}`);
+    await sleep(2000);
+
+    const failed = await db.collection('webhook_outbox')
+      .findOne({ 'data.transactionId': first.transaction?.transactionId });
+    console.log(`Outbox status: ${failed?.status}, attempts: ${failed?.attempts}`);
+    console.log(`Last error: ${failed?.lastError}`);
+    check(failed?.status === 'pending' && failed?.attempts === 1, 'Scheduled for retry', 'Not scheduled for retry');
+
+    // Step 3: Next delivery succeeds and is signed
+    console.log('\n📋 STEP 3: Signed Delivery');
+    console.log('-'.repeat(70));
+
+    const second = await recordTransaction(profile.apiKey, 'Webhook Test B');
+    console.log(`Recorded ${second.transaction?.transactionId}`);
+    await sleep(2000);
+
+    const delivery = receiver.deliveries.find(d =>
+      d.payload.events.some(event => event.data.transactionId === second.transaction?.transactionId)
+    );
+    check(delivery, `Received batch of ${delivery?.payload.events.length} event(s)`, 'Delivery not received');
+    check(delivery?.signatureValid, 'Signature valid', 'Signature invalid');
+
+    console.log('\n' + '='.repeat(70));
+    console.log('🎉 WEBHOOK TEST COMPLETE!\n');
+  } catch (error) {
+    console.error('❌ Error:', error);
+    process.exitCode = 1;
+  } finally {
+    receiver?.server.close();
+    await client.close();
+  }
+}
+
+testWebhooks();